@@ -1,18 +1,20 @@
 from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import logging
 import os
 from contextlib import asynccontextmanager
+from app.middleware import GetCORSMiddleware, SampledAccessLogMiddleware
 from app.routers import transcript
+from app.services.backends.manager import backend_manager
 from app.services.cache_service import cache_service
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
     
     logger.info("Starting YouTube Transcript API...")
     
@@ -24,31 +26,38 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down YouTube Transcript API...")
     await cache_service.disconnect()
+    await backend_manager.close()
 
 
 app = FastAPI(
     title="YouTube Transcript API",
     description="A RESTful API to fetch YouTube video transcripts using yt-dlp",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
+# CORS middleware (static headers for GET, full CORS handling for everything else)
 app.add_middleware(
-    CORSMiddleware,
+    GetCORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["GET", "POST", "DELETE"],
     allow_headers=["*"],
 )
 
+# Sampled access log (uvicorn's per-request access log is disabled)
+app.add_middleware(
+    SampledAccessLogMiddleware,
+    sample_rate=float(os.getenv("ACCESS_LOG_SAMPLE_RATE", 0.001))
+)
+
 # Include routers
 app.include_router(transcript.router)
 
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger = logging.getLogger(__name__)
     logger.error(f"Global exception: {exc}")
     return JSONResponse(
         status_code=500,
@@ -82,10 +91,17 @@ if __name__ == "__main__":
     
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
+    reload = os.getenv("DEBUG", "False").lower() == "true"
     
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
-        reload=True
+        loop="uvloop",
+        http="httptools",
+        reload=reload,
+        access_log=False,
+        log_config=None,
+        # Multiple workers are only used outside of reload (development) mode
+        workers=None if reload else int(os.getenv("WEB_CONCURRENCY", "4"))
     )
\ No newline at end of file
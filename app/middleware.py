@@ -0,0 +1,95 @@
+import logging
+import random
+import time
+from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class GetCORSMiddleware:
+    """
+    CORS middleware with a static fast path for GET requests
+
+    Every origin is allowed, so GET responses only need fixed headers and skip
+    the origin matching done by CORSMiddleware. Like CORSMiddleware, a request
+    carrying cookies gets its Origin echoed back with Allow-Credentials when
+    credentials are allowed. Other methods, including preflight OPTIONS
+    requests, are handled by the full CORSMiddleware.
+    """
+
+    STATIC_GET_HEADERS = [
+        (b"access-control-allow-origin", b"*"),
+        (b"access-control-expose-headers", b"ETag, X-Cache"),
+    ]
+
+    def __init__(self, app: ASGIApp, **cors_options):
+        self.app = app
+        self.cors = CORSMiddleware(app, **cors_options)
+        self.allow_credentials = cors_options.get("allow_credentials", False)
+
+    def _get_headers(self, scope: Scope):
+        if self.allow_credentials:
+            origin = cookie = None
+            for name, value in scope["headers"]:
+                if name == b"origin":
+                    origin = value
+                elif name == b"cookie":
+                    cookie = value
+            if origin and cookie:
+                return [
+                    (b"access-control-allow-origin", origin),
+                    (b"access-control-allow-credentials", b"true"),
+                    (b"access-control-expose-headers", b"ETag, X-Cache"),
+                    (b"vary", b"Origin"),
+                ]
+        return self.STATIC_GET_HEADERS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.cors(scope, receive, send)
+            return
+
+        cors_headers = self._get_headers(scope)
+
+        async def send_with_cors_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + cors_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors_headers)
+
+
+class SampledAccessLogMiddleware:
+    """
+    Access log that records only a random sample of requests
+
+    Used instead of uvicorn's access log, which formats and writes a line
+    for every request on the hot path.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.001):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.logger = logging.getLogger("access")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = None
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.logger.info(
+                "%s %s %s %.1fms",
+                scope["method"], scope["path"], status_code, elapsed_ms
+            )
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from pydantic import BaseModel, HttpUrl
 from typing import List, Optional, Dict, Any
 from datetime import datetime
@@ -10,7 +11,10 @@ class TranscriptRequest(BaseModel):
     backend: Optional[str] = None  # Optional backend preference
 
 
-class TranscriptSegment(BaseModel):
+# Plain slotted dataclass: segments come in lists of thousands, so avoid
+# per-instance BaseModel overhead. Pydantic still validates them at the API boundary.
+@dataclass(slots=True, frozen=True)
+class TranscriptSegment:
     text: str
     start: float
     duration: float
@@ -1,14 +1,81 @@
-from fastapi import APIRouter, HTTPException, Query, Path
+from fastapi import APIRouter, HTTPException, Query, Path, Request, Response
 from typing import Optional
-import re
 from app.models import TranscriptResponse, TranscriptRequest, ErrorResponse, BackendStatusResponse
-from app.services.transcript_service import transcript_service
+from app.services.transcript_service import transcript_service, is_valid_video_id
 from app.services.cache_service import cache_service
 import logging
 
 router = APIRouter(prefix="/api/v1/transcript", tags=["transcript"])
 logger = logging.getLogger(__name__)
 
+CACHE_CONTROL = "public, max-age=86400"
+
+
+def _validate_video_id(video_id: str):
+    """Validate the 11-character YouTube video ID format"""
+    if not is_valid_video_id(video_id):
+        raise HTTPException(status_code=400, detail="Invalid YouTube video ID format")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check whether an If-None-Match header matches the given ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+async def _check_cached_etag(request: Request, video_id: str, language: str) -> Optional[Response]:
+    """Answer a conditional request from the stored ETag alone, without loading the transcript"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    etag = await cache_service.get_etag(video_id, language)
+    if etag and _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    return None
+
+
+def _conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already has this ETag, otherwise tag the fresh response"""
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers["X-Cache"] = "MISS"
+    return None
+
+
+async def _get_cached_transcript(request: Request, video_id: str, language: str) -> Optional[Response]:
+    """Serve a transcript from cache, answering matching conditional requests with 304"""
+    not_modified = await _check_cached_etag(request, video_id, language)
+    if not_modified:
+        return not_modified
+    
+    etag, cached_data = await cache_service.get_transcript_and_etag(video_id, language)
+    if not cached_data:
+        return None
+    
+    if not etag:
+        # Entry cached without an ETag, derive it from the transcript itself
+        cached_transcript = cache_service.load_transcript(cached_data)
+        etag = cache_service.compute_etag(video_id, language, cached_transcript)
+    
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+    
+    # The cached payload is already the serialized response body, skip model validation
+    return Response(
+        content=cached_data,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "X-Cache": "HIT"}
+    )
+
 
 @router.get("/health")
 async def health_check():
@@ -44,6 +111,8 @@ async def clear_cache():
 
 @router.get("/{video_id}", response_model=TranscriptResponse)
 async def get_transcript_by_id(
+    request: Request,
+    response: Response,
     video_id: str = Path(..., description="YouTube video ID"),
     language: str = Query("en", description="Language code (e.g., en, es, fr, zh-CN)"),
     backend: Optional[str] = Query(None, description="Backend preference: youtube_transcript_api or yt_dlp")
@@ -51,14 +120,13 @@ async def get_transcript_by_id(
     """Get transcript by YouTube video ID"""
     
     # Validate video ID format
-    if not re.match(r'^[a-zA-Z0-9_-]{11}$', video_id):
-        raise HTTPException(status_code=400, detail="Invalid YouTube video ID format")
+    _validate_video_id(video_id)
     
     try:
         # Check cache first
-        cached_transcript = await cache_service.get_transcript(video_id, language)
-        if cached_transcript:
-            return cached_transcript
+        cached = await _get_cached_transcript(request, video_id, language)
+        if cached:
+            return cached
         
         # Get transcript from YouTube with backend preference
         transcript = await transcript_service.get_transcript(
@@ -67,8 +135,10 @@ async def get_transcript_by_id(
             backend=backend
         )
         
-        # Cache the result
-        await cache_service.set_transcript(video_id, language, transcript)
+        etag = cache_service.compute_etag(video_id, language, transcript)
+        not_modified = _conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
         
         return transcript
         
@@ -81,6 +151,8 @@ async def get_transcript_by_id(
 
 @router.get("/", response_model=TranscriptResponse)
 async def get_transcript_by_url(
+    request: Request,
+    response: Response,
     url: str = Query(..., description="YouTube video URL"),
     language: str = Query("en", description="Language code (e.g., en, es, fr, zh-CN)"),
     backend: Optional[str] = Query(None, description="Backend preference: youtube_transcript_api or yt_dlp")
@@ -92,9 +164,9 @@ async def get_transcript_by_url(
         video_id = transcript_service.extract_video_id(url)
         
         # Check cache first
-        cached_transcript = await cache_service.get_transcript(video_id, language)
-        if cached_transcript:
-            return cached_transcript
+        cached = await _get_cached_transcript(request, video_id, language)
+        if cached:
+            return cached
         
         # Get transcript from YouTube with backend preference
         transcript = await transcript_service.get_transcript(
@@ -103,8 +175,10 @@ async def get_transcript_by_url(
             backend=backend
         )
         
-        # Cache the result
-        await cache_service.set_transcript(video_id, language, transcript)
+        etag = cache_service.compute_etag(video_id, language, transcript)
+        not_modified = _conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
         
         return transcript
         
@@ -140,9 +214,6 @@ async def get_transcript_post(request: TranscriptRequest):
             backend=request.backend
         )
         
-        # Cache the result
-        await cache_service.set_transcript(video_id, request.language, transcript)
-        
         return transcript
         
     except ValueError as e:
@@ -159,8 +230,7 @@ async def get_available_languages(
 ):
     """Get available languages for a video"""
     
-    if not re.match(r'^[a-zA-Z0-9_-]{11}$', video_id):
-        raise HTTPException(status_code=400, detail="Invalid YouTube video ID format")
+    _validate_video_id(video_id)
     
     try:
         languages = await transcript_service.get_available_languages(video_id, backend)
@@ -181,8 +251,7 @@ async def delete_cached_transcript(
 ):
     """Delete cached transcript for specific video and language"""
     
-    if not re.match(r'^[a-zA-Z0-9_-]{11}$', video_id):
-        raise HTTPException(status_code=400, detail="Invalid YouTube video ID format")
+    _validate_video_id(video_id)
     
     await cache_service.delete_transcript(video_id, language)
     return {"message": f"Cached transcript for {video_id}:{language} deleted successfully"}
\ No newline at end of file
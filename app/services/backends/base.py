@@ -1,22 +1,47 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Mapping
 from app.models import TranscriptSegment
 import logging
 
 
+# Chinese language codes to try, in order of preference, when a requested
+# Chinese variant is missing, and the requested codes that trigger this fallback
+CHINESE_LANGUAGE_VARIANTS = ('zh-Hans', 'zh-CN', 'zh-cn', 'zh', 'chi', 'cmn', 'zh-Hant', 'zh-TW')
+CHINESE_LANGUAGE_TRIGGERS = frozenset({'zh-CN', 'zh-Hans', 'zh-cn'})
+
+
+@dataclass(frozen=True)
 class BackendInfo:
-    """Information about a transcript extraction backend"""
-    def __init__(self, name: str, version: str, capabilities: Dict[str, Any]):
-        self.name = name
-        self.version = version
-        self.capabilities = capabilities
+    """Information about a transcript extraction backend (read-only, safe to share)"""
+    name: str
+    version: str
+    capabilities: Mapping[str, Any]
+    
+    def __post_init__(self):
+        # frozen only blocks reassignment; also make the capabilities themselves read-only
+        object.__setattr__(self, "capabilities", MappingProxyType(dict(self.capabilities)))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain, serializable copy, independent of this instance"""
+        return {"name": self.name, "version": self.version, "capabilities": dict(self.capabilities)}
 
 
 class TranscriptBackend(ABC):
     """Abstract base class for transcript extraction backends"""
     
+    logger = logging.getLogger(__name__)
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # One class-level logger per backend, named after the backend class
+        cls.logger = logging.getLogger(cls.__name__)
+    
     def __init__(self):
-        self.logger = logging.getLogger(self.__class__.__name__)
+        # Precomputed once, backend info is static for the lifetime of the backend.
+        # The same dict is attached to every response, so treat it as read-only.
+        self.backend_info_dict: Dict[str, Any] = self.backend_info.to_dict()
     
     @property
     @abstractmethod
@@ -72,6 +97,10 @@ class TranscriptBackend(ABC):
         """Check if this backend is available and functional"""
         pass
     
+    async def close(self):
+        """Release resources held by this backend (override if needed)"""
+        pass
+    
     def normalize_language_code(self, language: str) -> str:
         """
         Normalize language code to common format
@@ -81,4 +110,4 @@ class TranscriptBackend(ABC):
     
     def get_chinese_language_variants(self) -> List[str]:
         """Get list of Chinese language code variants to try"""
-        return ['zh-Hans', 'zh-CN', 'zh-cn', 'zh', 'chi', 'cmn', 'zh-Hant', 'zh-TW']
\ No newline at end of file
+        return list(CHINESE_LANGUAGE_VARIANTS)
\ No newline at end of file
@@ -1,10 +1,9 @@
+import importlib.util
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from enum import Enum
 from app.models import TranscriptSegment
 from .base import TranscriptBackend, BackendInfo
-from .youtube_transcript_api import YouTubeTranscriptApiBackend
-from .yt_dlp import YtDlpBackend
 import logging
 
 
@@ -13,15 +12,36 @@ class BackendType(Enum):
     YT_DLP = "yt_dlp"
 
 
+# Backend modules are imported inside their factories so heavy libraries
+# (yt-dlp loads hundreds of extractors) are only pulled in when first used
+def _create_youtube_transcript_api_backend() -> TranscriptBackend:
+    from .youtube_transcript_api import YouTubeTranscriptApiBackend
+    return YouTubeTranscriptApiBackend()
+
+
+def _create_yt_dlp_backend() -> TranscriptBackend:
+    from .yt_dlp import YtDlpBackend
+    return YtDlpBackend()
+
+
+# Library behind each backend, so status checks can report a backend that has not
+# been created yet without importing it
+_BACKEND_LIBRARIES = {
+    BackendType.YOUTUBE_TRANSCRIPT_API: "youtube_transcript_api",
+    BackendType.YT_DLP: "yt_dlp"
+}
+
+
 class BackendManager:
     """Manages multiple transcript backends with fallback logic"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self._backends = {
-            BackendType.YOUTUBE_TRANSCRIPT_API: YouTubeTranscriptApiBackend(),
-            BackendType.YT_DLP: YtDlpBackend()
+        self._backend_factories: Dict[BackendType, Callable[[], TranscriptBackend]] = {
+            BackendType.YOUTUBE_TRANSCRIPT_API: _create_youtube_transcript_api_backend,
+            BackendType.YT_DLP: _create_yt_dlp_backend
         }
+        self._backend_instances: Dict[BackendType, TranscriptBackend] = {}
         
         # Configure backend order from environment or use defaults
         self.primary_backend = self._get_backend_from_env("TRANSCRIPT_BACKEND_PRIMARY", BackendType.YOUTUBE_TRANSCRIPT_API)
@@ -71,7 +91,7 @@ class BackendManager:
         last_error = None
         
         for backend_type in backends_to_try:
-            backend = self._backends[backend_type]
+            backend = self.get_backend(backend_type)
             
             if not backend.is_available():
                 self.logger.warning(f"Backend {backend_type.value} is not available, skipping")
@@ -84,7 +104,7 @@ class BackendManager:
                 
                 # Add backend metadata to result
                 result["backend_used"] = backend_type.value
-                result["backend_info"] = backend.backend_info.__dict__
+                result["backend_info"] = backend.backend_info_dict
                 
                 self.logger.info(f"Successfully extracted transcript using {backend_type.value}")
                 return result
@@ -112,7 +132,7 @@ class BackendManager:
         backends_to_try = [preferred_backend] if preferred_backend else [self.primary_backend, self.fallback_backend]
         
         for backend_type in backends_to_try:
-            backend = self._backends[backend_type]
+            backend = self.get_backend(backend_type)
             
             if not backend.is_available():
                 continue
@@ -131,11 +151,21 @@ class BackendManager:
         """Get status of all backends"""
         status = {}
         
-        for backend_type, backend in self._backends.items():
-            status[backend_type.value] = {
-                "available": backend.is_available(),
-                "info": backend.backend_info.__dict__
-            }
+        for backend_type in self._backend_factories:
+            backend = self._backend_instances.get(backend_type)
+            if backend is None:
+                # Not created yet; creating it here would import its heavy library
+                status[backend_type.value] = {
+                    "available": importlib.util.find_spec(_BACKEND_LIBRARIES[backend_type]) is not None,
+                    "info": None,
+                    "loaded": False
+                }
+            else:
+                status[backend_type.value] = {
+                    "available": backend.is_available(),
+                    "info": backend.backend_info_dict,
+                    "loaded": True
+                }
         
         return {
             "backends": status,
@@ -143,9 +173,18 @@ class BackendManager:
             "fallback": self.fallback_backend.value
         }
     
+    async def close(self):
+        """Close all backends that have been instantiated"""
+        for backend in self._backend_instances.values():
+            await backend.close()
+    
     def get_backend(self, backend_type: BackendType) -> TranscriptBackend:
-        """Get specific backend instance"""
-        return self._backends[backend_type]
+        """Get specific backend instance, creating it on first use"""
+        backend = self._backend_instances.get(backend_type)
+        if backend is None:
+            backend = self._backend_factories[backend_type]()
+            self._backend_instances[backend_type] = backend
+        return backend
 
 
 # Global backend manager instance
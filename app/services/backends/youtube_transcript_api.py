@@ -1,13 +1,36 @@
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Optional
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import (
     TranscriptsDisabled, 
     NoTranscriptFound, 
     VideoUnavailable
 )
-import yt_dlp
 from app.models import TranscriptSegment
-from .base import TranscriptBackend, BackendInfo
+from app.services.cache_service import cache_service
+from .base import TranscriptBackend, BackendInfo, CHINESE_LANGUAGE_TRIGGERS, CHINESE_LANGUAGE_VARIANTS
+
+
+# Static, so one shared instance is returned on every access
+_BACKEND_INFO = BackendInfo(
+    name="youtube-transcript-api",
+    version="0.6.2",
+    capabilities={
+        "manual_transcripts": True,
+        "auto_transcripts": True,
+        "language_translation": True,
+        "multiple_formats": True,
+        "proxy_support": True
+    }
+)
+
+
+def _extract_info(video_url: str, ydl_opts: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a blocking yt-dlp info extraction (called from a worker thread)"""
+    # Imported here so loading this backend does not pull in yt-dlp's extractors
+    import yt_dlp
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(video_url, download=False)
 
 
 class YouTubeTranscriptApiBackend(TranscriptBackend):
@@ -16,20 +39,11 @@ class YouTubeTranscriptApiBackend(TranscriptBackend):
     def __init__(self):
         super().__init__()
         self._api = YouTubeTranscriptApi()
+        self._available: Optional[bool] = None
     
     @property
     def backend_info(self) -> BackendInfo:
-        return BackendInfo(
-            name="youtube-transcript-api",
-            version="0.6.2",
-            capabilities={
-                "manual_transcripts": True,
-                "auto_transcripts": True,
-                "language_translation": True,
-                "multiple_formats": True,
-                "proxy_support": True
-            }
-        )
+        return _BACKEND_INFO
     
     async def get_transcript(
         self, 
@@ -39,11 +53,12 @@ class YouTubeTranscriptApiBackend(TranscriptBackend):
         """Extract transcript using youtube-transcript-api"""
         
         try:
-            # Get video metadata using yt-dlp (lightweight extraction)
-            metadata = await self._get_video_metadata(video_id)
-            
-            # Get available transcript languages
-            available_languages = await self.get_available_languages(video_id)
+            # Get video metadata (cached, or lightweight yt-dlp extraction) and
+            # available transcript languages concurrently
+            metadata, available_languages = await asyncio.gather(
+                self._get_video_metadata_cached(video_id),
+                self.get_available_languages(video_id)
+            )
             self.logger.info(f"Available languages: {available_languages}")
             
             # Try to get transcript in requested language
@@ -52,16 +67,16 @@ class YouTubeTranscriptApiBackend(TranscriptBackend):
             
             # First try exact language match
             try:
-                transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+                transcript_data = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id, languages=[language])
                 actual_language = language
             except (NoTranscriptFound, Exception):
                 # If Chinese language requested, try variations
-                if language in ['zh-CN', 'zh-Hans', 'zh-cn']:
-                    chinese_variants = self.get_chinese_language_variants()
-                    for variant in chinese_variants:
-                        if variant in available_languages:
+                if language in CHINESE_LANGUAGE_TRIGGERS:
+                    available = set(available_languages)
+                    for variant in CHINESE_LANGUAGE_VARIANTS:
+                        if variant in available:
                             try:
-                                transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=[variant])
+                                transcript_data = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id, languages=[variant])
                                 actual_language = variant
                                 self.logger.info(f"Found Chinese transcript with language code: {variant}")
                                 break
@@ -71,7 +86,7 @@ class YouTubeTranscriptApiBackend(TranscriptBackend):
                 # If still no transcript, try English as fallback
                 if not transcript_data and 'en' in available_languages and language != 'en':
                     try:
-                        transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
+                        transcript_data = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id, languages=['en'])
                         actual_language = 'en'
                         self.logger.info("Using English transcript as fallback")
                     except (NoTranscriptFound, Exception):
@@ -103,7 +118,7 @@ class YouTubeTranscriptApiBackend(TranscriptBackend):
         """Get available language codes using youtube-transcript-api"""
         try:
             # Use static method to list transcripts
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+            transcript_list = await asyncio.to_thread(YouTubeTranscriptApi.list_transcripts, video_id)
             languages = []
             
             # Get all available transcripts
@@ -122,35 +137,27 @@ class YouTubeTranscriptApiBackend(TranscriptBackend):
             return []
     
     def is_available(self) -> bool:
-        """Check if youtube-transcript-api is available"""
-        try:
-            # Try to import and create instance
-            from youtube_transcript_api import YouTubeTranscriptApi
-            api = YouTubeTranscriptApi()
-            return True
-        except ImportError:
-            return False
-        except Exception:
-            return False
+        """Check if youtube-transcript-api is available (checked once, then memoized)"""
+        if self._available is None:
+            try:
+                # Try to import and create instance
+                from youtube_transcript_api import YouTubeTranscriptApi
+                YouTubeTranscriptApi()
+                self._available = True
+            except ImportError:
+                self._available = False
+            except Exception:
+                self._available = False
+        return self._available
     
-    async def _get_video_metadata(self, video_id: str) -> Dict[str, Any]:
-        """Get video metadata using yt-dlp (faster than youtube-transcript-api for metadata)"""
-        ydl_opts = {
-            'skip_download': True,
-            'quiet': True,
-            'no_warnings': True,
-        }
+    async def _get_video_metadata_cached(self, video_id: str) -> Dict[str, Any]:
+        """Get video metadata from cache, falling back to yt-dlp extraction"""
+        metadata = await cache_service.get_metadata(video_id)
+        if metadata:
+            return metadata
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                video_url = f"https://www.youtube.com/watch?v={video_id}"
-                info = ydl.extract_info(video_url, download=False)
-                
-                return {
-                    "title": info.get('title', 'Unknown'),
-                    "channel": info.get('uploader', 'Unknown'),
-                    "duration": info.get('duration', 0)
-                }
+            metadata = await self._get_video_metadata(video_id)
         except Exception as e:
             self.logger.warning(f"Could not get metadata for {video_id}: {str(e)}")
             return {
@@ -158,19 +165,42 @@ class YouTubeTranscriptApiBackend(TranscriptBackend):
                 "channel": "Unknown", 
                 "duration": 0
             }
+        
+        await cache_service.set_metadata(video_id, metadata)
+        return metadata
+    
+    async def _get_video_metadata(self, video_id: str) -> Dict[str, Any]:
+        """Get video metadata using yt-dlp (faster than youtube-transcript-api for metadata)"""
+        ydl_opts = {
+            'skip_download': True,
+            'noplaylist': True,
+            'youtube_include_dash_manifest': False,
+            'youtube_include_hls_manifest': False,
+            'check_formats': False,
+            'socket_timeout': 10,
+            'quiet': True,
+            'no_warnings': True,
+        }
+        
+        video_url = f"https://www.youtube.com/watch?v={video_id}"
+        # extract_info is blocking network I/O, keep it off the event loop
+        info = await asyncio.to_thread(_extract_info, video_url, ydl_opts)
+        
+        return {
+            "title": info.get('title', 'Unknown'),
+            "channel": info.get('uploader', 'Unknown'),
+            "duration": info.get('duration', 0)
+        }
     
     def _convert_to_segments(self, transcript_data: List[Dict]) -> List[TranscriptSegment]:
         """Convert youtube-transcript-api format to our TranscriptSegment format"""
-        segments = []
-        
-        for item in transcript_data:
-            # youtube-transcript-api provides: text, start, duration
-            segment = TranscriptSegment(
-                text=item.get('text', '').strip(),
+        # youtube-transcript-api provides: text, start, duration. Drop empty segments.
+        return [
+            TranscriptSegment(
+                text=text,
                 start=float(item.get('start', 0)),
                 duration=float(item.get('duration', 0))
             )
-            if segment.text:  # Only add non-empty segments
-                segments.append(segment)
-        
-        return segments
\ No newline at end of file
+            for item in transcript_data
+            if (text := item.get('text', '').strip())
+        ]
\ No newline at end of file
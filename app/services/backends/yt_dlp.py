@@ -1,8 +1,122 @@
+import asyncio
+import codecs
+import httpx
+import orjson
+import os
 import yt_dlp
 import re
-from typing import List, Dict, Any
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from app.models import TranscriptSegment
-from .base import TranscriptBackend, BackendInfo
+from .base import TranscriptBackend, BackendInfo, CHINESE_LANGUAGE_TRIGGERS, CHINESE_LANGUAGE_VARIANTS
+
+
+# InnerTube player endpoint queried with the ANDROID client, which answers
+# faster than the web player and needs no player JS or signature handling
+_PLAYER_URL = "https://www.youtube.com/youtubei/v1/player"
+_ANDROID_CLIENT_VERSION = "19.09.37"
+_ANDROID_CONTEXT = {
+    "client": {
+        "clientName": "ANDROID",
+        "clientVersion": _ANDROID_CLIENT_VERSION,
+        "androidSdkVersion": 30,
+        "hl": "en"
+    }
+}
+_ANDROID_USER_AGENT = f"com.google.android.youtube/{_ANDROID_CLIENT_VERSION} (Linux; U; Android 11) gzip"
+
+# Subtitle info is listed for every language regardless of options, so one
+# extraction serves both transcript and language list lookups. Subtitle URLs are
+# read from the info dict in memory, so nothing is written, and the DASH/HLS
+# manifests and format checks that only matter for downloads are skipped.
+_YDL_OPTS = {
+    'writesubtitles': False,
+    'writeautomaticsub': False,
+    'skip_download': True,
+    'noplaylist': True,
+    'youtube_include_dash_manifest': False,
+    'youtube_include_hls_manifest': False,
+    'check_formats': False,
+    'socket_timeout': 10,
+    'quiet': True,
+    'no_warnings': True,
+}
+
+# Static, so one shared instance is returned on every access
+_BACKEND_INFO = BackendInfo(
+    name="yt-dlp",
+    version="2025.6.30",
+    capabilities={
+        "manual_transcripts": True,
+        "auto_transcripts": True,
+        "language_translation": False,
+        "multiple_formats": True,
+        "video_metadata": True,
+        "robust_extraction": True
+    }
+)
+
+# How long (seconds) an extracted info dict is reused, and how many are kept
+_INFO_CACHE_TTL = 60
+_INFO_CACHE_SIZE = 64
+
+# A VTT cue: timing line (format: 00:00:01.000 --> 00:00:03.000 [settings])
+# followed by its text lines up to the next blank line. Timestamps are split
+# into (hours, minutes, seconds, milliseconds) groups, hours being optional.
+_VTT_TIMESTAMP = r'(?:(\d+):)?(\d{2}):(\d{2})\.(\d{3})'
+_VTT_CUE_RE = re.compile(
+    r'^[^\S\n]*' + _VTT_TIMESTAMP + r'[^\S\n]+-->[^\S\n]+' + _VTT_TIMESTAMP + r'[^\n]*\n?'
+    r'((?:[^\S\n]*\S[^\n]*(?:\n|$))*)',
+    re.MULTILINE
+)
+# VTT cleanup pattern: inline tags and positioning info (kept within a single line)
+_VTT_CLEAN_RE = re.compile(r'<[^>\n]+>|\{[^}\n]+\}')
+
+
+def _timestamp_ms(hours: Optional[str], minutes: str, seconds: str, millis: str) -> int:
+    """Convert VTT timestamp groups to integer milliseconds"""
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis)
+
+
+async def _decode_utf8(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream chunk by chunk; WebVTT is always UTF-8"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def _slim_tracks(tracks: Optional[Dict[str, List[Dict[str, Any]]]]) -> Dict[str, str]:
+    """
+    Map each subtitle language to the one URL that would be downloaded
+    
+    Prefers vtt, the format _parse_subtitles understands, else the first listed
+    format. This is the only place a subtitle format is chosen, and the result has
+    the same code -> URL shape as the tracks read on the player API fast path.
+    """
+    slim = {}
+    for lang, formats in (tracks or {}).items():
+        urls_by_ext = {f.get('ext'): f.get('url') for f in formats if f.get('url')}
+        url = urls_by_ext.get('vtt') or next(iter(urls_by_ext.values()), None)
+        if url:
+            slim[lang] = url
+    return slim
+
+
+def _slim_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a yt-dlp info dict, which lists every format, to the fields this backend reads"""
+    return {
+        'title': info.get('title', 'Unknown'),
+        'uploader': info.get('uploader', 'Unknown'),
+        'duration': info.get('duration', 0),
+        'subtitles': _slim_tracks(info.get('subtitles')),
+        'automatic_captions': _slim_tracks(info.get('automatic_captions')),
+    }
 
 
 class YtDlpBackend(TranscriptBackend):
@@ -10,223 +124,292 @@ class YtDlpBackend(TranscriptBackend):
     
     def __init__(self):
         super().__init__()
+        self._available: Optional[bool] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # Bounded LRU of slimmed info dicts: video_id -> (expiry on the monotonic clock, info)
+        self._info_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Idle YoutubeDL instances, reused because construction (extractor and opener
+        # setup) is expensive. Each is used by one extraction at a time, and the
+        # semaphore below bounds how many exist.
+        self._ydl_pool: List[yt_dlp.YoutubeDL] = []
+        # Caps concurrent requests to YouTube to stay clear of rate limiting (HTTP 429)
+        self._youtube_semaphore = asyncio.Semaphore(int(os.getenv('YOUTUBE_MAX_CONCURRENCY', 8)))
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, created on first use"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(http2=True, timeout=20, follow_redirects=True)
+        return self._http_client
+    
+    async def close(self):
+        while self._ydl_pool:
+            self._ydl_pool.pop().close()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
     
     @property
     def backend_info(self) -> BackendInfo:
-        return BackendInfo(
-            name="yt-dlp",
-            version="2025.6.30",
-            capabilities={
-                "manual_transcripts": True,
-                "auto_transcripts": True,
-                "language_translation": False,
-                "multiple_formats": True,
-                "video_metadata": True,
-                "robust_extraction": True
-            }
-        )
+        return _BACKEND_INFO
     
     async def get_transcript(
         self, 
         video_id: str, 
         language: str = "en"
     ) -> Dict[str, Any]:
-        """Extract transcript using yt-dlp (refactored from original code)"""
-        
-        ydl_opts = {
-            'writesubtitles': True,
-            'writeautomaticsub': True,
-            'subtitleslangs': [language],
-            'skip_download': True,
-            'quiet': True,
-            'no_warnings': True,
-        }
+        """
+        Extract transcript, trying the direct player API fast path first and
+        falling back to a full yt-dlp extraction (refactored from original code)
+        """
+        try:
+            return await self._fast_fetch_timedtext(video_id, language)
+        except Exception as e:
+            self.logger.info(f"Fast caption fetch failed for {video_id}, falling back to yt-dlp: {str(e)}")
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                video_url = f"https://www.youtube.com/watch?v={video_id}"
-                info = ydl.extract_info(video_url, download=False)
-                
-                if not info:
-                    raise Exception("Failed to extract video information")
-                
-                title = info.get('title', 'Unknown')
-                channel = info.get('uploader', 'Unknown')
-                duration = info.get('duration', 0)
-                
-                # Extract subtitles
-                subtitles = info.get('subtitles', {})
-                auto_subtitles = info.get('automatic_captions', {})
-                
-                # Get all available languages
-                available_languages = list(set(list(subtitles.keys()) + list(auto_subtitles.keys())))
-                
-                # Log available languages for debugging
-                self.logger.info(f"Available manual subtitles: {list(subtitles.keys())}")
-                self.logger.info(f"Available auto captions: {list(auto_subtitles.keys())}")
-                
-                # Try to get subtitles in the specified language
-                subtitle_data = subtitles.get(language) or auto_subtitles.get(language)
-                actual_language = language
-                
-                # If Chinese language not found, try common Chinese language code variations
-                if not subtitle_data and language in ['zh-CN', 'zh-Hans', 'zh-cn']:
-                    chinese_codes = self.get_chinese_language_variants()
-                    for code in chinese_codes:
-                        subtitle_data = subtitles.get(code) or auto_subtitles.get(code)
-                        if subtitle_data:
-                            actual_language = code
-                            self.logger.info(f"Found Chinese subtitles with code: {code}")
-                            break
-                
-                if not subtitle_data:
-                    # Try English as fallback
-                    subtitle_data = subtitles.get('en') or auto_subtitles.get('en')
-                    if subtitle_data:
-                        actual_language = 'en'
-                        self.logger.info("Using English subtitles as fallback")
-                
-                if not subtitle_data:
-                    raise Exception(f"No transcripts available for language: {language}. Available languages: {available_languages}")
-                
-                # Get the subtitle URL (prefer vtt format)
-                subtitle_url = None
-                for sub in subtitle_data:
-                    if sub.get('ext') == 'vtt':
-                        subtitle_url = sub.get('url')
-                        break
-                
-                if not subtitle_url and subtitle_data:
-                    subtitle_url = subtitle_data[0].get('url')
-                
-                if not subtitle_url:
-                    raise Exception("No subtitle URL found")
-                
-                # Download and parse subtitles
-                segments = await self._parse_subtitles(ydl, subtitle_url)
-                
-                return {
-                    "title": title,
-                    "channel": channel,
-                    "duration": duration,
-                    "language": actual_language,
-                    "segments": segments,
-                    "available_languages": available_languages
-                }
-                
+            info = await self._get_info(video_id)
+            
+            if not info:
+                raise Exception("Failed to extract video information")
+            
+            title = info.get('title', 'Unknown')
+            channel = info.get('uploader', 'Unknown')
+            duration = info.get('duration', 0)
+            
+            # Extract subtitles
+            subtitles = info.get('subtitles', {})
+            auto_subtitles = info.get('automatic_captions', {})
+            
+            # Get all available languages
+            available_languages = list(set(list(subtitles.keys()) + list(auto_subtitles.keys())))
+            
+            # Log available languages for debugging
+            self.logger.info(f"Available manual subtitles: {list(subtitles.keys())}")
+            self.logger.info(f"Available auto captions: {list(auto_subtitles.keys())}")
+            
+            subtitle_url, actual_language = self._select_subtitles(language, subtitles, auto_subtitles)
+            
+            if not subtitle_url:
+                raise Exception(f"No transcripts available for language: {language}. Available languages: {available_languages}")
+            
+            # Download and parse subtitles
+            segments = await self._download_subtitles(subtitle_url)
+            if not segments:
+                # e.g. only a non-VTT format was listed; do not cache an empty transcript
+                raise Exception("Subtitle track is empty or not in VTT format")
+            
+            return {
+                "title": title,
+                "channel": channel,
+                "duration": duration,
+                "language": actual_language,
+                "segments": segments,
+                "available_languages": available_languages
+            }
+            
         except Exception as e:
             self.logger.error(f"Error getting transcript for {video_id}: {str(e)}")
             raise Exception(f"Failed to get transcript: {str(e)}")
     
-    async def get_available_languages(self, video_id: str) -> List[str]:
-        """Get available language codes using yt-dlp"""
-        ydl_opts = {
-            'writesubtitles': True,
-            'writeautomaticsub': True,
-            'skip_download': True,
-            'quiet': True,
-            'no_warnings': True,
+    async def _fast_fetch_timedtext(self, video_id: str, language: str) -> Dict[str, Any]:
+        """
+        Fetch captions straight from the InnerTube player API, skipping the yt-dlp extractor
+        
+        Only native caption tracks are considered; anything else (translations,
+        English fallback) raises so the caller falls back to yt-dlp.
+        """
+        client = self._get_http_client()
+        async with self._youtube_semaphore:
+            response = await client.post(
+                _PLAYER_URL,
+                params={"prettyPrint": "false"},
+                json={"context": _ANDROID_CONTEXT, "videoId": video_id},
+                headers={"User-Agent": _ANDROID_USER_AGENT}
+            )
+        response.raise_for_status()
+        player = orjson.loads(response.content)
+        
+        tracklist = player.get("captions", {}).get("playerCaptionsTracklistRenderer", {})
+        tracks = tracklist.get("captionTracks", [])
+        if not tracks:
+            raise Exception("No caption tracks in player response")
+        
+        # Split into manual and auto-generated (asr) tracks, like yt-dlp does
+        subtitles = {t["languageCode"]: t["baseUrl"] for t in tracks if t.get("kind") != "asr"}
+        auto_subtitles = {t["languageCode"]: t["baseUrl"] for t in tracks if t.get("kind") == "asr"}
+        
+        subtitle_url, actual_language = self._select_subtitles(
+            language, subtitles, auto_subtitles, english_fallback=False
+        )
+        if not subtitle_url:
+            raise Exception(f"No caption track for language: {language}")
+        
+        segments = await self._download_subtitles(subtitle_url, params={"fmt": "vtt"})
+        if not segments:
+            raise Exception("Caption track is empty")
+        
+        # List translation targets too, like yt-dlp's automatic_captions, so the
+        # field does not depend on which path answered
+        translation_languages = {
+            t["languageCode"] for t in tracklist.get("translationLanguages", []) if t.get("languageCode")
+        }
+        
+        details = player.get("videoDetails", {})
+        return {
+            "title": details.get("title", "Unknown"),
+            "channel": details.get("author", "Unknown"),
+            "duration": int(details.get("lengthSeconds", 0)),
+            "language": actual_language,
+            "segments": segments,
+            "available_languages": list(subtitles.keys() | auto_subtitles.keys() | translation_languages)
         }
+    
+    def _select_subtitles(
+        self,
+        language: str,
+        subtitles: Dict[str, str],
+        auto_subtitles: Dict[str, str],
+        english_fallback: bool = True
+    ) -> Tuple[Optional[str], str]:
+        """Pick a manual or auto subtitle URL for a language, trying Chinese variants and English"""
+        # Try to get subtitles in the specified language
+        subtitle_data = subtitles.get(language) or auto_subtitles.get(language)
+        actual_language = language
+        
+        # If Chinese language not found, try common Chinese language code variations
+        if not subtitle_data and language in CHINESE_LANGUAGE_TRIGGERS:
+            available = subtitles.keys() | auto_subtitles.keys()
+            code = next((c for c in CHINESE_LANGUAGE_VARIANTS if c in available), None)
+            if code:
+                subtitle_data = subtitles.get(code) or auto_subtitles.get(code)
+                actual_language = code
+                self.logger.info(f"Found Chinese subtitles with code: {code}")
         
+        if not subtitle_data and english_fallback:
+            # Try English as fallback
+            subtitle_data = subtitles.get('en') or auto_subtitles.get('en')
+            if subtitle_data:
+                actual_language = 'en'
+                self.logger.info("Using English subtitles as fallback")
+        
+        return subtitle_data, actual_language
+    
+    async def get_available_languages(self, video_id: str) -> List[str]:
+        """Get available language codes using yt-dlp"""
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                video_url = f"https://www.youtube.com/watch?v={video_id}"
-                info = ydl.extract_info(video_url, download=False)
-                
-                if not info:
-                    return []
-                
-                subtitles = info.get('subtitles', {})
-                auto_subtitles = info.get('automatic_captions', {})
-                
-                # Combine both manual and auto-generated subtitle languages
-                available_languages = list(set(list(subtitles.keys()) + list(auto_subtitles.keys())))
-                return available_languages
-                
+            info = await self._get_info(video_id)
+            
+            if not info:
+                return []
+            
+            subtitles = info.get('subtitles', {})
+            auto_subtitles = info.get('automatic_captions', {})
+            
+            # Combine both manual and auto-generated subtitle languages
+            available_languages = list(set(list(subtitles.keys()) + list(auto_subtitles.keys())))
+            return available_languages
+            
         except Exception as e:
             self.logger.error(f"Error getting available languages for {video_id}: {str(e)}")
             return []
     
+    async def _get_info(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get yt-dlp video info, reusing an extraction from the last _INFO_CACHE_TTL seconds
+        
+        Lets get_transcript and get_available_languages share one extractor run.
+        """
+        now = time.monotonic()
+        # Entries are inserted in expiry order, so expired ones sit at the front
+        while self._info_cache and next(iter(self._info_cache.values()))[0] <= now:
+            self._info_cache.popitem(last=False)
+        
+        cached = self._info_cache.get(video_id)
+        if cached:
+            return cached[1]
+        
+        video_url = f"https://www.youtube.com/watch?v={video_id}"
+        # extract_info is blocking network I/O, keep it off the event loop
+        async with self._youtube_semaphore:
+            ydl = self._ydl_pool.pop() if self._ydl_pool else await asyncio.to_thread(yt_dlp.YoutubeDL, _YDL_OPTS)
+            try:
+                info = await asyncio.to_thread(ydl.extract_info, video_url, download=False)
+            finally:
+                self._ydl_pool.append(ydl)
+        
+        if info:
+            # Full info dicts list every format; keep only what is read back
+            info = _slim_info(info)
+            self._info_cache.pop(video_id, None)
+            self._info_cache[video_id] = (time.monotonic() + _INFO_CACHE_TTL, info)
+            while len(self._info_cache) > _INFO_CACHE_SIZE:
+                self._info_cache.popitem(last=False)
+        return info
+    
     def is_available(self) -> bool:
-        """Check if yt-dlp is available"""
-        try:
-            import yt_dlp
-            return True
-        except ImportError:
-            return False
-        except Exception:
-            return False
+        """Check if yt-dlp is available (checked once, then memoized)"""
+        if self._available is None:
+            try:
+                import yt_dlp
+                self._available = True
+            except ImportError:
+                self._available = False
+            except Exception:
+                self._available = False
+        return self._available
     
-    async def _parse_subtitles(self, ydl, subtitle_url: str) -> List[TranscriptSegment]:
-        """Parse subtitle content from VTT format (from original implementation)"""
+    async def _download_subtitles(self, subtitle_url: str, params: Optional[Dict[str, str]] = None) -> List[TranscriptSegment]:
+        """Stream a VTT file and parse it as it arrives, without holding the whole file"""
+        async with self._youtube_semaphore:
+            async with self._get_http_client().stream("GET", subtitle_url, params=params) as response:
+                response.raise_for_status()
+                return await self._parse_subtitle_stream(_decode_utf8(response.aiter_bytes(8192)))
+    
+    async def _parse_subtitle_stream(self, chunks: AsyncIterator[str]) -> List[TranscriptSegment]:
+        """
+        Parse streamed VTT text block by block
+        
+        Cues never span a blank line, so everything up to the last blank line
+        received is parsed right away and only the unfinished block is buffered.
+        """
+        segments = []
+        buffer = ""
+        async for chunk in chunks:
+            buffer += chunk
+            cut = max(buffer.rfind("\n\n"), buffer.rfind("\n\r\n"))
+            if cut != -1:
+                segments.extend(self._parse_subtitles(buffer[:cut + 1]))
+                buffer = buffer[cut + 1:]
+        if buffer:
+            segments.extend(self._parse_subtitles(buffer))
+        return segments
+    
+    def _parse_subtitles(self, subtitle_content: str) -> List[TranscriptSegment]:
+        """Parse subtitle content from VTT format, one regex pass over the cues"""
         try:
-            # Download subtitle content
-            subtitle_content = ydl.urlopen(subtitle_url).read().decode('utf-8')
-            
             segments = []
-            lines = subtitle_content.split('\n')
             
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
+            for match in _VTT_CUE_RE.finditer(subtitle_content):
+                groups = match.groups()
                 
-                # Skip empty lines and WEBVTT headers
-                if not line or line.startswith('WEBVTT') or line.startswith('NOTE'):
-                    i += 1
+                # Remove HTML tags and positioning info, then join the non-empty text lines
+                text = ' '.join(filter(None, (
+                    line.strip() for line in _VTT_CLEAN_RE.sub('', groups[8]).splitlines()
+                )))
+                if not text:
                     continue
                 
-                # Look for timestamp line (format: 00:00:01.000 --> 00:00:03.000)
-                if '-->' in line:
-                    time_parts = line.split(' --> ')
-                    if len(time_parts) == 2:
-                        start_time = self._parse_timestamp(time_parts[0])
-                        end_time = self._parse_timestamp(time_parts[1])
-                        
-                        # Get the text (next non-empty lines)
-                        i += 1
-                        text_lines = []
-                        while i < len(lines) and lines[i].strip():
-                            text_line = lines[i].strip()
-                            # Remove HTML tags and positioning info
-                            text_line = re.sub(r'<[^>]+>', '', text_line)
-                            text_line = re.sub(r'\{[^}]+\}', '', text_line)
-                            if text_line:
-                                text_lines.append(text_line)
-                            i += 1
-                        
-                        if text_lines:
-                            text = ' '.join(text_lines)
-                            duration = end_time - start_time
-                            
-                            segments.append(TranscriptSegment(
-                                text=text,
-                                start=start_time,
-                                duration=duration
-                            ))
-                    else:
-                        i += 1
-                else:
-                    i += 1
+                # Integer millisecond arithmetic on the fixed-format groups, no float parsing
+                start_ms = _timestamp_ms(*groups[0:4])
+                end_ms = _timestamp_ms(*groups[4:8])
+                segments.append(TranscriptSegment(
+                    text=text,
+                    start=start_ms / 1000,
+                    duration=(end_ms - start_ms) / 1000
+                ))
             
             return segments
             
         except Exception as e:
             self.logger.error(f"Error parsing subtitles: {str(e)}")
             raise Exception(f"Failed to parse subtitles: {str(e)}")
-    
-    def _parse_timestamp(self, timestamp: str) -> float:
-        """Parse timestamp format: 00:00:01.000 (from original implementation)"""
-        timestamp = timestamp.strip()
-        time_parts = timestamp.split(':')
-        
-        if len(time_parts) == 3:
-            hours = float(time_parts[0])
-            minutes = float(time_parts[1])
-            seconds = float(time_parts[2])
-            return hours * 3600 + minutes * 60 + seconds
-        elif len(time_parts) == 2:
-            minutes = float(time_parts[0])
-            seconds = float(time_parts[1])
-            return minutes * 60 + seconds
-        else:
-            return float(time_parts[0])
\ No newline at end of file
@@ -1,53 +1,242 @@
 import redis.asyncio as redis
-import json
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+import asyncio
+import hashlib
+import orjson
 import os
-from typing import Optional
-from datetime import datetime, timedelta
+import time
+import zstandard
+from collections import OrderedDict
+from typing import Optional, Tuple
 from app.models import TranscriptResponse
 import logging
 
 
+# Transcript JSON is highly repetitive and compresses well, which cuts Redis
+# memory and network bytes. Payloads are a one-byte format version followed by
+# a zstd frame of the JSON body; JSON is kept (rather than e.g. msgpack) so cache
+# hits can be served to clients without re-encoding.
+_PAYLOAD_VERSION = b"\x01"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_compressor = zstandard.ZstdCompressor(level=3)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def _compress(payload: bytes) -> bytes:
+    return _PAYLOAD_VERSION + _compressor.compress(payload)
+
+
+def _decompress(cached_data: bytes) -> bytes:
+    if cached_data.startswith(_PAYLOAD_VERSION):
+        return _decompressor.decompress(cached_data[1:])
+    # Older entries are a bare zstd frame or plain JSON
+    if cached_data.startswith(_ZSTD_MAGIC):
+        return _decompressor.decompress(cached_data)
+    return cached_data
+
+
+# Pub/sub channel used to drop in-process cache entries in every worker
+INVALIDATION_CHANNEL = "transcript:invalidate"
+
+# Sorted set of cached transcript keys scored by their expiry (unix time), so stats
+# can count live transcripts with ZCARD after trimming expired members
+TRANSCRIPT_INDEX_KEY = "transcript:expiries"
+# Plain set used as the index before the sorted set; still removed on clear
+LEGACY_TRANSCRIPT_INDEX_KEY = "transcript:index"
+
+# Keys requested per SCAN call and deleted per UNLINK call
+SCAN_BATCH_SIZE = 500
+
+
 class CacheService:
     def __init__(self):
         self.redis = None
+        self._pool = None
         self.logger = logging.getLogger(__name__)
         self.default_ttl = int(os.getenv('CACHE_TTL', 3600))  # 1 hour default
+        self.metadata_ttl = int(os.getenv('METADATA_CACHE_TTL', 86400))  # 24 hours default
+        
+        # Bounded in-process LRU in front of Redis for the hottest transcripts:
+        # (video_id, language) -> (JSON payload, ETag, expiry on the monotonic clock)
+        self._local: "OrderedDict[Tuple[str, str], Tuple[bytes, str, float]]" = OrderedDict()
+        self.local_cache_size = int(os.getenv('LOCAL_CACHE_SIZE', 512))
+        self.local_cache_ttl = int(os.getenv('LOCAL_CACHE_TTL', 60))
+        self._invalidation_task: Optional[asyncio.Task] = None
         
     async def connect(self):
         try:
             redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
-            self.redis = redis.from_url(redis_url, decode_responses=True)
+            # One bounded pool shared by every request; callers wait for a free
+            # connection instead of failing when it is exhausted. Replies stay as raw bytes.
+            pool_options = {
+                "max_connections": int(os.getenv('REDIS_POOL_SIZE', 32)),
+                "decode_responses": False,
+                "health_check_interval": 30,
+                "retry_on_timeout": True,
+                "retry": Retry(ExponentialBackoff(), 3),
+            }
+            # Keepalive is a TCP option; unix:// URLs (co-located Redis) connect over a socket file
+            if not redis_url.startswith("unix://"):
+                pool_options["socket_keepalive"] = True
+            self._pool = redis.BlockingConnectionPool.from_url(redis_url, **pool_options)
+            self.redis = redis.Redis(connection_pool=self._pool)
             await self.redis.ping()
             self.logger.info("Connected to Redis cache")
+            self._invalidation_task = asyncio.create_task(self._listen_for_invalidations())
         except Exception as e:
             self.logger.warning(f"Failed to connect to Redis: {e}")
             self.redis = None
     
     async def disconnect(self):
+        if self._invalidation_task:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except asyncio.CancelledError:
+                pass
         if self.redis:
             await self.redis.close()
+        if self._pool:
+            await self._pool.disconnect()
+    
+    async def _listen_for_invalidations(self):
+        """Drop in-process cache entries invalidated by any worker, resubscribing after failures"""
+        delay = 1
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    # Invalidations may have been missed while unsubscribed
+                    self._invalidate_local("*")
+                    delay = 1
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._invalidate_local(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"Lost cache invalidation subscription, retrying in {delay}s: {e}")
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+    
+    def _invalidate_local(self, target: str):
+        if target == "*":
+            self._local.clear()
+        else:
+            video_id, _, language = target.partition(":")
+            self._local.pop((video_id, language), None)
+    
+    def _get_local(self, video_id: str, language: str) -> Optional[Tuple[bytes, str]]:
+        key = (video_id, language)
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        
+        payload, etag, expires_at = entry
+        if expires_at < time.monotonic():
+            self._local.pop(key, None)
+            return None
+        
+        self._local.move_to_end(key)
+        return payload, etag
+    
+    def _set_local(self, video_id: str, language: str, payload: bytes, etag: str):
+        key = (video_id, language)
+        self._local[key] = (payload, etag, time.monotonic() + self.local_cache_ttl)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_cache_size:
+            self._local.popitem(last=False)
     
     def _get_cache_key(self, video_id: str, language: str = "en") -> str:
         return f"transcript:{video_id}:{language}"
     
+    def _get_etag_key(self, video_id: str, language: str = "en") -> str:
+        return f"etag:{video_id}:{language}"
+    
+    def _get_metadata_key(self, video_id: str) -> str:
+        return f"meta:{video_id}"
+    
+    @staticmethod
+    def compute_etag(video_id: str, language: str, transcript: TranscriptResponse) -> str:
+        """Compute a stable, quoted ETag for a transcript of a (video_id, language) pair"""
+        segments = transcript.segments
+        last_start = segments[-1].start if segments else 0
+        digest = hashlib.blake2b(
+            f"{video_id}:{language}:{len(segments)}:{last_start}".encode(),
+            digest_size=16
+        ).hexdigest()
+        return f'"{digest}"'
+    
     async def get_transcript(self, video_id: str, language: str = "en") -> Optional[TranscriptResponse]:
+        # Shares the in-process cache and single round trip of get_transcript_and_etag
+        _, payload = await self.get_transcript_and_etag(video_id, language)
+        if payload:
+            try:
+                return self.load_transcript(payload)
+            except Exception as e:
+                self.logger.error(f"Error decoding cached transcript: {e}")
+            
+        return None
+    
+    def load_transcript(self, cached_data: bytes) -> TranscriptResponse:
+        """Deserialize a cached transcript payload"""
+        transcript = TranscriptResponse.model_validate_json(cached_data)
+        transcript.cached = True
+        return transcript
+    
+    async def get_transcript_and_etag(self, video_id: str, language: str = "en") -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        Get the stored ETag and the raw cached transcript payload in a single round trip
+        
+        The payload is returned as decompressed JSON bytes so callers only pay for
+        deserialization when needed. Hot entries are served from the in-process cache.
+        """
+        local = self._get_local(video_id, language)
+        if local:
+            payload, etag = local
+            return etag, payload
+        
         if not self.redis:
-            return None
+            return None, None
             
         try:
-            cache_key = self._get_cache_key(video_id, language)
-            cached_data = await self.redis.get(cache_key)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(self._get_etag_key(video_id, language))
+                pipe.get(self._get_cache_key(video_id, language))
+                etag, cached_data = await pipe.execute()
             
-            if cached_data:
-                data = json.loads(cached_data)
-                # Parse the timestamp
-                data['timestamp'] = datetime.fromisoformat(data['timestamp'])
-                data['cached'] = True
-                return TranscriptResponse(**data)
+            if not cached_data:
+                return None, None
+            
+            payload = _decompress(cached_data)
+            if etag:
+                etag = etag.decode()
+                self._set_local(video_id, language, payload, etag)
+            return etag, payload
                 
         except Exception as e:
             self.logger.error(f"Error retrieving from cache: {e}")
             
+        return None, None
+    
+    async def get_etag(self, video_id: str, language: str = "en") -> Optional[str]:
+        """Get only the stored ETag, avoiding a fetch of the full transcript payload"""
+        local = self._get_local(video_id, language)
+        if local:
+            return local[1]
+        
+        if not self.redis:
+            return None
+            
+        try:
+            etag = await self.redis.get(self._get_etag_key(video_id, language))
+            if etag:
+                return etag.decode()
+        except Exception as e:
+            self.logger.error(f"Error retrieving ETag from cache: {e}")
+            
         return None
     
     async def set_transcript(self, video_id: str, language: str, transcript: TranscriptResponse, ttl: Optional[int] = None):
@@ -57,43 +246,104 @@ class CacheService:
         try:
             cache_key = self._get_cache_key(video_id, language)
             
-            # Convert to dict for JSON serialization
-            data = transcript.dict()
-            data['timestamp'] = transcript.timestamp.isoformat()
-            
-            # Convert segments to dict format
-            data['segments'] = [segment.dict() for segment in transcript.segments]
+            # Store the final JSON response body so cache hits can be served as-is.
+            # A shallow dict keeps segments as dataclasses, which orjson encodes natively,
+            # instead of converting each one to a dict first via model_dump().
+            data = dict(transcript)
+            data['cached'] = True
+            body = orjson.dumps(data)
+            payload = _compress(body)
             
             cache_ttl = ttl or self.default_ttl
-            await self.redis.setex(cache_key, cache_ttl, json.dumps(data))
+            etag = self.compute_etag(video_id, language, transcript)
+            
+            # All writes go out in one round trip. The ETag is persisted alongside the
+            # transcript so conditional requests stay cheap.
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.setex(cache_key, cache_ttl, payload)
+                pipe.setex(self._get_etag_key(video_id, language), cache_ttl, etag)
+                now = time.time()
+                pipe.zadd(TRANSCRIPT_INDEX_KEY, {cache_key: now + cache_ttl})
+                pipe.zremrangebyscore(TRANSCRIPT_INDEX_KEY, "-inf", now)
+                await pipe.execute()
+            
+            # Warm the in-process cache so the next request in this worker skips Redis
+            self._set_local(video_id, language, body, etag)
             
             self.logger.info(f"Cached transcript for {video_id}:{language}")
             
         except Exception as e:
             self.logger.error(f"Error setting cache: {e}")
     
+    async def get_metadata(self, video_id: str) -> Optional[dict]:
+        """Get cached video metadata (title, channel, duration)"""
+        if not self.redis:
+            return None
+            
+        try:
+            cached_data = await self.redis.get(self._get_metadata_key(video_id))
+            if cached_data:
+                return orjson.loads(cached_data)
+        except Exception as e:
+            self.logger.error(f"Error retrieving metadata from cache: {e}")
+            
+        return None
+    
+    async def set_metadata(self, video_id: str, metadata: dict, ttl: Optional[int] = None):
+        """Cache video metadata, which changes rarely compared to transcripts"""
+        if not self.redis:
+            return
+            
+        try:
+            await self.redis.setex(self._get_metadata_key(video_id), ttl or self.metadata_ttl, orjson.dumps(metadata))
+        except Exception as e:
+            self.logger.error(f"Error setting metadata cache: {e}")
+    
     async def delete_transcript(self, video_id: str, language: str = "en"):
         if not self.redis:
             return
             
         try:
             cache_key = self._get_cache_key(video_id, language)
-            await self.redis.delete(cache_key)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(cache_key, self._get_etag_key(video_id, language))
+                pipe.zrem(TRANSCRIPT_INDEX_KEY, cache_key)
+                await pipe.execute()
+            self._invalidate_local(f"{video_id}:{language}")
+            await self.redis.publish(INVALIDATION_CHANNEL, f"{video_id}:{language}")
             self.logger.info(f"Deleted cache for {video_id}:{language}")
             
         except Exception as e:
             self.logger.error(f"Error deleting from cache: {e}")
     
+    async def _unlink_matching(self, pattern: str, exclude: frozenset = frozenset()) -> int:
+        """Delete keys matching a pattern with SCAN + batched UNLINK, which never block Redis"""
+        keys = [
+            key async for key in self.redis.scan_iter(match=pattern, count=SCAN_BATCH_SIZE)
+            if key not in exclude
+        ]
+        for i in range(0, len(keys), SCAN_BATCH_SIZE):
+            await self.redis.unlink(*keys[i:i + SCAN_BATCH_SIZE])
+        return len(keys)
+    
     async def clear_all_cache(self):
         if not self.redis:
             return
             
         try:
-            pattern = "transcript:*"
-            keys = await self.redis.keys(pattern)
-            if keys:
-                await self.redis.delete(*keys)
-                self.logger.info(f"Cleared {len(keys)} cached transcripts")
+            # Index keys match the transcript pattern; delete them separately so
+            # they are not counted as transcripts
+            index_keys = (TRANSCRIPT_INDEX_KEY, LEGACY_TRANSCRIPT_INDEX_KEY)
+            deleted = await self._unlink_matching(
+                "transcript:*", exclude=frozenset(key.encode() for key in index_keys)
+            )
+            await self._unlink_matching("etag:*")
+            await self.redis.unlink(*index_keys)
+            if deleted:
+                self.logger.info(f"Cleared {deleted} cached transcripts")
+            
+            self._invalidate_local("*")
+            await self.redis.publish(INVALIDATION_CHANNEL, "*")
                 
         except Exception as e:
             self.logger.error(f"Error clearing cache: {e}")
@@ -104,12 +354,15 @@ class CacheService:
             
         try:
             info = await self.redis.info()
-            pattern = "transcript:*"
-            keys = await self.redis.keys(pattern)
+            # Count from the index after dropping members whose transcripts have expired
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(TRANSCRIPT_INDEX_KEY, "-inf", time.time())
+                pipe.zcard(TRANSCRIPT_INDEX_KEY)
+                _, cached_transcripts = await pipe.execute()
             
             return {
                 "status": "connected",
-                "cached_transcripts": len(keys),
+                "cached_transcripts": cached_transcripts,
                 "memory_used": info.get("used_memory_human", "unknown"),
                 "connected_clients": info.get("connected_clients", 0)
             }
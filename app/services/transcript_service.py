@@ -1,22 +1,54 @@
+import asyncio
 import re
-from typing import Optional, Dict, List
+import string
+from typing import Any, Awaitable, Callable, Optional, Dict, List, Tuple
 from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
 from app.models import TranscriptResponse
+from app.services.cache_service import cache_service
 from app.services.backends.manager import backend_manager, BackendType
 import logging
 
 
+VIDEO_ID_CHARS = frozenset(string.ascii_letters + string.digits + "_-")
+
+# Fallback for less common URL forms (embed, /v/, /e/, other paths ending in the ID, ...)
+_YOUTUBE_URL_RE = re.compile(
+    r'(?:youtube\.com\/(?:[^\/]+\/.+\/|(?:v|e(?:mbed)?)\/|.*[?&]v=)|youtu\.be\/)([^"&?\/\s]{11})'
+)
+
+
+def is_valid_video_id(video_id: str) -> bool:
+    """Check the 11-character YouTube video ID format"""
+    return len(video_id) == 11 and VIDEO_ID_CHARS.issuperset(video_id)
+
+
 class TranscriptService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.backend_manager = backend_manager
+        self._inflight: Dict[Tuple[str, ...], asyncio.Future] = {}
         
     def extract_video_id(self, url: str) -> str:
         """Extract YouTube video ID from URL"""
-        youtube_regex = re.compile(
-            r'(?:youtube\.com\/(?:[^\/]+\/.+\/|(?:v|e(?:mbed)?)\/|.*[?&]v=)|youtu\.be\/)([^"&?\/\s]{11})'
-        )
-        match = youtube_regex.search(url)
+        # Fast paths for the common forms: youtu.be/<id>, youtube.com/shorts/<id>
+        # and youtube.com/watch?v=<id>
+        short = url.find('youtu.be/')
+        shorts = url.find('youtube.com/shorts/') if short == -1 else -1
+        if short != -1:
+            video_id = url[short + 9:short + 20]
+            if is_valid_video_id(video_id):
+                return video_id
+        elif shorts != -1:
+            video_id = url[shorts + 19:shorts + 30]
+            if is_valid_video_id(video_id):
+                return video_id
+        elif 'youtube.com/watch' in url:
+            video_id = parse_qs(urlsplit(url).query).get('v', [''])[0]
+            if is_valid_video_id(video_id):
+                return video_id
+        
+        match = _YOUTUBE_URL_RE.search(url)
         if match:
             return match.group(1)
         raise ValueError("Invalid YouTube URL")
@@ -51,6 +83,34 @@ class TranscriptService:
             except ValueError:
                 self.logger.warning(f"Invalid backend specified: {backend}, using default fallback")
         
+        return await self._singleflight(
+            ("transcript", video_id, language, backend or ""),
+            lambda: self._fetch_transcript(video_id, language, preferred_backend)
+        )
+    
+    async def _singleflight(self, key: Tuple[str, ...], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Coalesce concurrent calls for the same key into a single fetch
+        
+        Waiters are shielded so a disconnecting client does not cancel the shared fetch.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.logger.info(f"Joining in-flight fetch for {':'.join(key)}")
+        
+        return await asyncio.shield(future)
+    
+    async def _fetch_transcript(
+        self,
+        video_id: str,
+        language: str,
+        preferred_backend: Optional[BackendType]
+    ) -> TranscriptResponse:
+        """Fetch a transcript through the backend manager and build the response"""
         try:
             # Use backend manager to get transcript with fallback
             result = await self.backend_manager.get_transcript(
@@ -59,20 +119,28 @@ class TranscriptService:
                 preferred_backend=preferred_backend
             )
             
-            # Convert to our response format
-            return TranscriptResponse(
+            # Convert to our response format. Every field but the segments is validated
+            # here, before the response is cached and served as raw bytes. Segments are
+            # TranscriptSegment dataclasses built by the backends, so re-validating
+            # thousands of them is skipped by attaching them afterwards.
+            response = TranscriptResponse(
                 video_id=video_id,
                 title=result["title"],
                 channel=result["channel"],
                 duration=result["duration"],
                 language=result["language"],
-                segments=result["segments"],
+                segments=[],
                 timestamp=datetime.now(),
                 cached=False,
                 backend_used=result.get("backend_used"),
                 backend_info=result.get("backend_info"),
                 available_languages=result.get("available_languages", [])
             )
+            response.segments = result["segments"]
+            
+            # Cached here, inside the coalesced fetch, so concurrent waiters share one write
+            await cache_service.set_transcript(video_id, language, response)
+            return response
                 
         except Exception as e:
             self.logger.error(f"Error getting transcript for {video_id}: {str(e)}")
@@ -92,9 +160,12 @@ class TranscriptService:
                 self.logger.warning(f"Invalid backend specified: {backend}")
         
         try:
-            return await self.backend_manager.get_available_languages(
-                video_id=video_id,
-                preferred_backend=preferred_backend
+            return await self._singleflight(
+                ("languages", video_id, backend or ""),
+                lambda: self.backend_manager.get_available_languages(
+                    video_id=video_id,
+                    preferred_backend=preferred_backend
+                )
             )
         except Exception as e:
             self.logger.error(f"Error getting available languages for {video_id}: {str(e)}")